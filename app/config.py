@@ -1,8 +1,12 @@
 # app/config.py
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
+
     # App
     app_env: str = Field("local", alias="APP_ENV")
     tz: str = Field("Europe/Warsaw", alias="TZ")
@@ -28,8 +32,10 @@ class Settings(BaseSettings):
     max_prompt_regens: int = Field(1, alias="MAX_PROMPT_REGENS")
     max_total_failure_cycles: int = Field(2, alias="MAX_TOTAL_FAILURE_CYCLES")
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
 
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
+
+
+settings = get_settings()
@@ -2,14 +2,19 @@
 
 from __future__ import annotations
 
+import atexit
 import contextvars
-import json
 import logging
+import os
 import sys
+import threading
+import time
 from datetime import datetime
 from typing import Any
 from zoneinfo import ZoneInfo
 
+import orjson
+
 from app.config import settings
 
 _ctx_request_id: contextvars.ContextVar[str | None] = contextvars.ContextVar(
@@ -23,17 +28,32 @@ _ctx_run_number: contextvars.ContextVar[int | None] = contextvars.ContextVar(
 )
 
 
-_ZONE = ZoneInfo(settings.tz)
+LOCAL_ZONE = ZoneInfo(settings.tz)
+_dumps = orjson.dumps
 
 
 class _JsonLogFormatter(logging.Formatter):
     """Serialize log records into single-line JSON objects."""
 
-    def format(self, record: logging.LogRecord) -> str:
-        log_context = get_log_context()
-        timestamp = datetime.now(_ZONE).isoformat(
+    def __init__(self) -> None:
+        super().__init__()
+        self._last_ts: tuple[int, str] = (-1, "")
+
+    def _timestamp(self) -> str:
+        """Return the local ISO timestamp, reusing it within the same millisecond."""
+
+        now_ms = time.time_ns() // 1_000_000
+        cached_ms, cached_ts = self._last_ts
+        if now_ms == cached_ms:
+            return cached_ts
+        timestamp = datetime.fromtimestamp(now_ms / 1000, LOCAL_ZONE).isoformat(
             timespec="milliseconds"
         )
+        self._last_ts = (now_ms, timestamp)
+        return timestamp
+
+    def format(self, record: logging.LogRecord) -> str:
+        timestamp = self._timestamp()
 
         message: str
         try:
@@ -49,15 +69,90 @@ class _JsonLogFormatter(logging.Formatter):
             "func": record.funcName,
             "line": record.lineno,
             "message": message,
-            "request_id": log_context.get("request_id"),
-            "job_id": log_context.get("job_id"),
-            "run_number": log_context.get("run_number"),
+            "request_id": _ctx_request_id.get(),
+            "job_id": _ctx_job_id.get(),
+            "run_number": _ctx_run_number.get(),
         }
 
         if record.exc_info:
             payload["exc_info"] = self.formatException(record.exc_info)
 
-        return json.dumps(payload, ensure_ascii=False)
+        return _dumps(payload).decode("utf-8")
+
+
+class _BufferedStdoutHandler(logging.StreamHandler):
+    """Collect encoded log lines and write them to stdout in batches."""
+
+    flush_threshold = 4096
+    flush_interval = 0.05
+
+    def __init__(self) -> None:
+        super().__init__(sys.stdout)
+        self._buffer = bytearray()
+        self._stopped = threading.Event()
+        self._start_flusher()
+        # Threads do not survive fork (gunicorn preload_app imports this in the
+        # master), so every child starts its own flusher.
+        os.register_at_fork(before=self.flush, after_in_child=self._reinit_after_fork)
+
+    def _start_flusher(self) -> None:
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, name="log-flusher", daemon=True
+        )
+        self._flusher.start()
+
+    def _reinit_after_fork(self) -> None:
+        # Lines emitted after the pre-fork flush belong to the parent.
+        self._buffer.clear()
+        if self._stopped.is_set():
+            return
+        self._stopped = threading.Event()
+        self._start_flusher()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            line = self.format(record).encode("utf-8") + b"\n"
+            self.acquire()
+            try:
+                self._buffer += line
+                pending = len(self._buffer)
+            finally:
+                self.release()
+            if pending >= self.flush_threshold:
+                self.flush()
+        except Exception:  # pragma: no cover - defensive
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if not self._buffer:
+                return
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            binary = getattr(self.stream, "buffer", None)
+            if binary is not None:
+                # Push out pending print() text first so it stays in order.
+                self.stream.flush()
+                binary.write(data)
+                binary.flush()
+            else:
+                self.stream.write(data.decode("utf-8"))
+                self.stream.flush()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        self._stopped.set()
+        self.flush()
+        super().close()
+
+    def _flush_periodically(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:  # pragma: no cover - defensive
+                pass
 
 
 _configured = False
@@ -75,10 +170,11 @@ def configure_logging(level: int = logging.INFO) -> None:
     root_logger.setLevel(level)
     root_logger.handlers.clear()
 
-    handler = logging.StreamHandler(sys.stdout)
+    handler = _BufferedStdoutHandler()
     handler.setLevel(level)
     handler.setFormatter(_JsonLogFormatter())
     root_logger.addHandler(handler)
+    atexit.register(handler.flush)
 
     for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
         uvicorn_logger = logging.getLogger(name)
@@ -102,6 +198,12 @@ def set_job_context(job_id: str | None, run_number: int | None) -> None:
     _ctx_run_number.set(run_number)
 
 
+def get_request_id() -> str | None:
+    """Return the request identifier from the logging context."""
+
+    return _ctx_request_id.get()
+
+
 def get_log_context() -> dict[str, Any]:
     """Return a shallow copy of the current logging context values."""
 
@@ -4,16 +4,17 @@ from __future__ import annotations
 
 import logging
 import sys
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+from typing import AsyncIterator
 
 import uvicorn
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-from zoneinfo import ZoneInfo
+from fastapi.responses import ORJSONResponse
 
 from app.config import settings
-from app.logging_conf import configure_logging, set_job_context
+from app.logging_conf import LOCAL_ZONE, configure_logging, set_job_context
 from app.middleware import RequestContextMiddleware, get_request_id_from_context
 from app.models.dto import HealthResponse, RunNowResponse
 from app.queue import enqueue_run_now, queue_size
@@ -21,19 +22,13 @@ from app.queue import enqueue_run_now, queue_size
 configure_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title="Nano Banana — Clothes Backend",
-    version="0.1.0",
-    docs_url="/docs",
-    openapi_url="/openapi.json",
-)
-
-app.add_middleware(RequestContextMiddleware)
+# Validation error fields left out of 422 responses (pydantic's url/ctx/input).
+_OMITTED_ERROR_FIELDS = frozenset({"url", "ctx", "input"})
 
 
-@app.on_event("startup")
-async def on_startup() -> None:
-    """Emit an informative startup banner."""
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Emit the startup banner and log when the application shuts down."""
 
     logger.info(
         "%s v%s (env=%s, tz=%s, python=%s, structured_logging=true)",
@@ -43,23 +38,33 @@ async def on_startup() -> None:
         settings.tz,
         sys.version.split()[0],
     )
+    yield
+    logger.info("application shutdown")
 
 
-@app.on_event("shutdown")
-async def on_shutdown() -> None:
-    """Log when the application is shutting down."""
+app = FastAPI(
+    title="Nano Banana — Clothes Backend",
+    version="0.1.0",
+    docs_url="/docs",
+    openapi_url="/openapi.json",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
-    logger.info("application shutdown")
+app.add_middleware(RequestContextMiddleware)
 
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(
     request: Request, exc: RequestValidationError
-) -> JSONResponse:
+) -> ORJSONResponse:
     """Return a JSON error when request validation fails."""
 
     request_id = get_request_id_from_context()
-    errors = exc.errors()
+    errors = [
+        {key: value for key, value in error.items() if key not in _OMITTED_ERROR_FIELDS}
+        for error in exc.errors()
+    ]
     issue_count = len(errors)
     logger.warning(
         "validation error on %s (%d issue(s)) [request_id=%s]",
@@ -67,7 +72,7 @@ async def validation_exception_handler(
         issue_count,
         request_id,
     )
-    response = JSONResponse(
+    response = ORJSONResponse(
         status_code=422,
         content={"detail": errors, "request_id": request_id},
     )
@@ -79,7 +84,7 @@ async def validation_exception_handler(
 @app.exception_handler(Exception)
 async def generic_exception_handler(
     request: Request, exc: Exception
-) -> JSONResponse:
+) -> ORJSONResponse:
     """Catch-all handler that returns a 500 JSON response."""
 
     request_id = get_request_id_from_context()
@@ -91,7 +96,7 @@ async def generic_exception_handler(
         request_id,
         exc_info=True,
     )
-    response = JSONResponse(
+    response = ORJSONResponse(
         status_code=500,
         content={"detail": "Internal Server Error", "request_id": request_id},
     )
@@ -108,8 +113,7 @@ async def health() -> HealthResponse:
     logger.info("health probe [request_id=%s]", request_id)
 
     now_utc = datetime.now(timezone.utc)
-    local_zone = ZoneInfo(settings.tz)
-    now_local = datetime.now(local_zone)
+    now_local = now_utc.astimezone(LOCAL_ZONE)
     response = HealthResponse(
         status="ok",
         env=settings.app_env,
@@ -1,38 +1,50 @@
-"""Custom FastAPI middleware for logging context propagation."""
+"""Custom ASGI middleware for logging context propagation."""
 
 from __future__ import annotations
 
-import uuid
+import secrets
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
-from starlette.types import RequestResponseEndpoint
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app import logging_conf
 
+_REQUEST_ID_HEADER = b"x-request-id"
 
-class RequestContextMiddleware(BaseHTTPMiddleware):
+
+class RequestContextMiddleware:
     """Attach and propagate a request identifier for each HTTP request."""
 
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
-        incoming_request_id = (request.headers.get("X-Request-ID") or "").strip()
-        request_id = incoming_request_id or uuid.uuid4().hex
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming_request_id = ""
+        for name, value in scope["headers"]:
+            if name == _REQUEST_ID_HEADER:
+                incoming_request_id = value.decode("latin-1").strip()
+                break
+        request_id = incoming_request_id or secrets.token_hex(16)
         logging_conf.set_request_id(request_id)
 
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+            await send(message)
+
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_with_request_id)
         finally:
             logging_conf.set_request_id(None)
             logging_conf.set_job_context(None, None)
 
-        response.headers["X-Request-ID"] = request_id
-        return response
-
 
 def get_request_id_from_context() -> str | None:
     """Retrieve the current request identifier from the logging context."""
 
-    return logging_conf.get_log_context().get("request_id")
+    return logging_conf.get_request_id()
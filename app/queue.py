@@ -2,28 +2,26 @@
 
 from __future__ import annotations
 
-import asyncio
 import logging
-import uuid
+import secrets
+from collections import deque
 
 from app import logging_conf
 
 
 logger = logging.getLogger(__name__)
 
-_queue: asyncio.Queue[str] = asyncio.Queue()
+_queue: deque[str] = deque()
 
 
 def enqueue_run_now() -> str:
     """Enqueue a placeholder run-now job and return its identifier."""
 
-    job_id = str(uuid.uuid4())
+    job_id = secrets.token_hex(16)
     try:
         logging_conf.set_job_context(job_id, None)
-        _queue.put_nowait(job_id)
+        _queue.append(job_id)
         logger.info("job enqueued (stub)")
-    except asyncio.QueueFull:
-        logger.warning("Queue is full; job %s could not be enqueued", job_id)
     finally:
         logging_conf.set_job_context(None, None)
     return job_id
@@ -32,4 +30,4 @@ def enqueue_run_now() -> str:
 def queue_size() -> int:
     """Return the number of queued jobs."""
 
-    return _queue.qsize()
+    return len(_queue)
@@ -5,47 +5,57 @@ from __future__ import annotations
 import hashlib
 import logging
 import time
+from functools import lru_cache
 from typing import Optional
 
 from openai import OpenAI
 from openai.types.beta.threads import Run
 
 from app.config import settings
-from app.logging_conf import get_log_context
+from app.logging_conf import get_request_id
 from app.services import prompt_templates
 from app.services.prompt_guard import sanitize, validate_prompt
 
 LOGGER = logging.getLogger(__name__)
-CLIENT = OpenAI(api_key=settings.openai_api_key)
 MODEL = "gpt-4o-mini"
-POLL_INTERVAL_SECONDS = 0.5
+POLL_INITIAL_INTERVAL_SECONDS = 0.2
+POLL_MAX_INTERVAL_SECONDS = 3.0
+POLL_BACKOFF_FACTOR = 1.5
 POLL_TIMEOUT_SECONDS = 90.0
 
 
-def _sha1(text: str) -> str:
-    """Return the first 12 hexadecimal characters of a SHA1 digest."""
+def _short_hash(data: bytes) -> str:
+    """Return a 12 hexadecimal character BLAKE2b fingerprint of ``data``."""
 
-    digest = hashlib.sha1(text.encode("utf-8"))
-    return digest.hexdigest()[:12]
+    return hashlib.blake2b(data, digest_size=6).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _client() -> OpenAI:
+    """Return the shared OpenAI client, constructing it on first use."""
+
+    return OpenAI(api_key=settings.openai_api_key)
 
 
 def _poll_run(thread_id: str, run_id: str) -> Run:
-    """Poll the run until it reaches a terminal state."""
+    """Poll the run with exponential backoff until it reaches a terminal state."""
 
     deadline = time.monotonic() + POLL_TIMEOUT_SECONDS
+    interval = POLL_INITIAL_INTERVAL_SECONDS
     while True:
-        run = CLIENT.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
+        run = _client().beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
         if run.status in {"completed", "failed", "cancelled", "expired"}:
             return run
         if time.monotonic() > deadline:
             raise RuntimeError("assistant_run_timeout")
-        time.sleep(POLL_INTERVAL_SECONDS)
+        time.sleep(interval)
+        interval = min(interval * POLL_BACKOFF_FACTOR, POLL_MAX_INTERVAL_SECONDS)
 
 
 def _extract_latest_text(thread_id: str) -> str:
     """Fetch the latest assistant message text from the thread."""
 
-    messages = CLIENT.beta.threads.messages.list(thread_id=thread_id, order="desc", limit=5)
+    messages = _client().beta.threads.messages.list(thread_id=thread_id, order="desc", limit=5)
     for message in messages.data:
         if message.role != "assistant":
             continue
@@ -58,8 +68,11 @@ def _extract_latest_text(thread_id: str) -> str:
     raise RuntimeError("assistant_no_text_response")
 
 
+@lru_cache(maxsize=1)
 def _create_assistant() -> str:
-    assistant = CLIENT.beta.assistants.create(
+    """Create the prompt assistant once per process and return its id."""
+
+    assistant = _client().beta.assistants.create(
         model=MODEL,
         instructions=prompt_templates.ASSISTANT_SYSTEM,
         name="Leatherwear Prompt Assistant",
@@ -73,16 +86,17 @@ def generate_prompt_text() -> str:
     last_reason: Optional[str] = None
     logged_error = False
     try:
+        client = _client()
         for attempt in range(2):
             user_prompt = prompt_templates.build_randomized_user_prompt()
             assistant_id = _create_assistant()
-            thread = CLIENT.beta.threads.create()
-            CLIENT.beta.threads.messages.create(
+            thread = client.beta.threads.create()
+            client.beta.threads.messages.create(
                 thread_id=thread.id,
                 role="user",
                 content=user_prompt,
             )
-            run = CLIENT.beta.threads.runs.create(
+            run = client.beta.threads.runs.create(
                 thread_id=thread.id,
                 assistant_id=assistant_id,
             )
@@ -116,15 +130,15 @@ def generate_prompt_text() -> str:
             if note:
                 LOGGER.warning("assistant prompt warning", extra={"warning": note})
 
-            context = get_log_context()
-            LOGGER.info(
-                "assistant prompt generated",
-                extra={
-                    "len": len(sanitized),
-                    "sha1": _sha1(sanitized),
-                    "request_id": context.get("request_id"),
-                },
-            )
+            if LOGGER.isEnabledFor(logging.INFO):
+                LOGGER.info(
+                    "assistant prompt generated",
+                    extra={
+                        "len": len(sanitized),
+                        "prompt_fp": _short_hash(sanitized.encode("utf-8")),
+                        "request_id": get_request_id(),
+                    },
+                )
             return sanitized
 
         LOGGER.error(
@@ -2,31 +2,52 @@
 
 from __future__ import annotations
 
-import base64
 import binascii
+import contextvars
 import hashlib
 import logging
-from typing import Any, Callable
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Iterator
 
 import google.generativeai as genai
 
 from app.config import settings
 
-# Configure the SDK immediately; this does not trigger outbound requests.
-genai.configure(api_key=settings.google_api_key)
-
 MODEL_NAME = "models/gemini-2.5-flash-image-preview"
 
 LOGGER = logging.getLogger(__name__)
 
 _PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_ALLOWED_FORMATS = frozenset({"png"})
+
+_SERVER_ERROR_CODES = frozenset(range(500, 600))
+# Programming errors are re-raised without inspecting the exception further.
+_NEVER_RETRY: frozenset[type[Exception]] = frozenset({ValueError, TypeError, KeyError, AttributeError})
+_TRANSIENT_MESSAGE_RE = re.compile(r"\b5\d\d\b|5xx|temporarily unavailable", re.IGNORECASE)
+
+# Base delay before each attempt; each delay is scaled by a random 0.5-1.5x.
+_RETRY_DELAYS = (0.0, 0.1, 0.4)
+# Attempts after the first retry only start within this budget.
+_RETRY_BUDGET_SECONDS = 1.0
+_rand = random.random
+
+
+@lru_cache(maxsize=1)
+def _get_model() -> genai.GenerativeModel:
+    """Configure the SDK and build the shared model handle on first use."""
 
+    genai.configure(api_key=settings.google_api_key)
+    return genai.GenerativeModel(MODEL_NAME)
 
-def short_sha1(text: str) -> str:
-    """Return the first 12 hexadecimal characters of a SHA1 digest."""
 
-    digest = hashlib.sha1(text.encode("utf-8"))
-    return digest.hexdigest()[:12]
+def short_hash(data: bytes) -> str:
+    """Return a 12 hexadecimal character BLAKE2b fingerprint of ``data``."""
+
+    return hashlib.blake2b(data, digest_size=6).hexdigest()
 
 
 def _is_transient_error(exc: Exception) -> bool:
@@ -35,109 +56,112 @@ def _is_transient_error(exc: Exception) -> bool:
     if isinstance(exc, (ConnectionError, TimeoutError)):
         return True
 
-    status_code = getattr(exc, "status_code", None)
-    if isinstance(status_code, int) and 500 <= status_code < 600:
+    if getattr(exc, "status_code", None) in _SERVER_ERROR_CODES:
         return True
 
-    code = getattr(exc, "code", None)
-    if isinstance(code, int) and 500 <= code < 600:
+    if getattr(exc, "code", None) in _SERVER_ERROR_CODES:
         return True
 
     response = getattr(exc, "response", None)
-    response_status = getattr(response, "status_code", None)
-    if isinstance(response_status, int) and 500 <= response_status < 600:
+    if getattr(response, "status_code", None) in _SERVER_ERROR_CODES:
         return True
 
-    message = str(exc).lower()
-    transient_tokens = (" 500", " 502", " 503", " 504", "5xx", "temporarily unavailable")
-    return any(token in message for token in transient_tokens)
+    return _TRANSIENT_MESSAGE_RE.search(str(exc)) is not None
 
 
 def _run_with_retry(func: Callable[[], Any]) -> Any:
-    """Execute ``func`` and retry once if a transient error is raised."""
+    """Execute ``func``, retrying transient errors with jittered backoff."""
 
-    last_error: Exception | None = None
-    for attempt in range(2):
+    deadline = time.monotonic() + _RETRY_BUDGET_SECONDS
+    last_attempt = len(_RETRY_DELAYS) - 1
+    for attempt, delay in enumerate(_RETRY_DELAYS):
+        if delay:
+            time.sleep(delay * (0.5 + _rand()))
         try:
             return func()
         except Exception as exc:  # noqa: BLE001 - intentional broad catch for retry logic
-            if attempt == 0 and _is_transient_error(exc):
-                last_error = exc
-                continue
-            raise
-    if last_error:
-        raise last_error
+            if type(exc) in _NEVER_RETRY:
+                raise
+            if attempt == last_attempt or (attempt and time.monotonic() >= deadline):
+                raise
+            if not _is_transient_error(exc):
+                raise
     raise RuntimeError("unreachable")
 
 
 def _decode_base64(data: str | bytes | bytearray) -> bytes | None:
     """Decode base64 input into bytes, returning ``None`` on failure."""
 
-    if isinstance(data, str):
-        try:
-            return base64.b64decode(data, validate=True)
-        except binascii.Error:
-            return None
-    if isinstance(data, (bytes, bytearray)):
-        try:
-            return base64.b64decode(data, validate=True)
-        except binascii.Error:
-            return None
-    return None
-
+    if not isinstance(data, (str, bytes, bytearray)) or len(data) & 3:
+        return None
+    try:
+        return binascii.a2b_base64(data)
+    except ValueError:  # binascii.Error, or non-ASCII characters in a str
+        return None
 
-def _append_png(images: list[bytes], payload: bytes) -> None:
-    """Append ``payload`` to ``images`` and warn on invalid signature."""
 
-    if not payload.startswith(_PNG_SIGNATURE):
-        LOGGER.warning("non-png-signature; len=%d", len(payload))
-    images.append(payload)
+def _append_png(images: list[bytes], payload: bytes | bytearray) -> None:
+    """Append ``payload`` to ``images``; skip and warn on an invalid signature.
 
+    ``bytes`` payloads are appended as-is; a ``bytearray`` is copied only once
+    it has passed the signature check.
+    """
 
-def _extract_png_bytes(response: Any) -> list[bytes]:
-    """Extract PNG byte payloads from a Gemini SDK response object."""
+    if not payload.startswith(_PNG_SIGNATURE):
+        if LOGGER.isEnabledFor(logging.WARNING):
+            LOGGER.warning("non-png-signature; len=%d", len(payload))
+        return
+    images.append(payload if isinstance(payload, bytes) else bytes(payload))
 
-    images: list[bytes] = []
 
-    candidates = getattr(response, "candidates", None)
-    if candidates is None and isinstance(response, dict):
-        candidates = response.get("candidates", [])
+def _iter_object_inline_data(response: Any) -> Iterator[tuple[str, Any]]:
+    """Yield ``(mime_type, data)`` pairs from an SDK response object."""
 
-    for candidate in candidates or []:
+    for candidate in getattr(response, "candidates", None) or ():
         content = getattr(candidate, "content", None)
-        if content is None and isinstance(candidate, dict):
-            content = candidate.get("content")
         if content is None:
             continue
-        parts = getattr(content, "parts", None)
-        if parts is None and isinstance(content, dict):
-            parts = content.get("parts", [])
-        for part in parts or []:
+        for part in getattr(content, "parts", None) or ():
             inline_data = getattr(part, "inline_data", None)
-            if inline_data is None and isinstance(part, dict):
-                inline_data = part.get("inline_data")
-            if not inline_data:
-                continue
-            mime_type = getattr(inline_data, "mime_type", "")
-            if isinstance(inline_data, dict):
-                mime_type = inline_data.get("mime_type", mime_type)
-            if mime_type != "image/png":
-                continue
-            data = getattr(inline_data, "data", None)
-            if isinstance(inline_data, dict):
-                data = inline_data.get("data", data)
-            if data is None:
-                continue
-            if isinstance(data, (bytes, bytearray)):
-                payload = bytes(data)
-            elif isinstance(data, str):
-                decoded = _decode_base64(data)
-                if decoded is None:
-                    continue
-                payload = decoded
-            else:
+            if inline_data:
+                yield getattr(inline_data, "mime_type", ""), getattr(inline_data, "data", None)
+
+
+def _iter_dict_inline_data(response: dict[str, Any]) -> Iterator[tuple[str, Any]]:
+    """Yield ``(mime_type, data)`` pairs from a dict-shaped response."""
+
+    for candidate in response.get("candidates") or ():
+        content = candidate.get("content")
+        if content is None:
+            continue
+        for part in content.get("parts") or ():
+            inline_data = part.get("inline_data")
+            if inline_data:
+                yield inline_data.get("mime_type", ""), inline_data.get("data")
+
+
+def _extract_png_bytes(response: Any) -> list[bytes]:
+    """Extract PNG byte payloads from a Gemini SDK response object."""
+
+    if isinstance(response, dict):
+        inline_items = _iter_dict_inline_data(response)
+    else:
+        inline_items = _iter_object_inline_data(response)
+
+    images: list[bytes] = []
+    for mime_type, data in inline_items:
+        if mime_type != "image/png" or data is None:
+            continue
+        if isinstance(data, (bytes, bytearray)):
+            payload = data
+        elif isinstance(data, str):
+            decoded = _decode_base64(data)
+            if decoded is None:
                 continue
-            _append_png(images, payload)
+            payload = decoded
+        else:
+            continue
+        _append_png(images, payload)
 
     return images
 
@@ -149,6 +173,23 @@ def _generate_with_model(model: genai.GenerativeModel, prompt: str) -> list[byte
     return _extract_png_bytes(response)
 
 
+def _generate_concurrently(model: genai.GenerativeModel, prompt: str, count: int) -> list[bytes]:
+    """Issue ``count`` generation calls in parallel and collect their PNGs in order."""
+
+    if count == 1:
+        return _generate_with_model(model, prompt)
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, _generate_with_model, model, prompt)
+            for _ in range(count)
+        ]
+        pngs: list[bytes] = []
+        for future in futures:
+            pngs.extend(future.result())
+    return pngs
+
+
 def generate_images(prompt: str, n: int = 2, aspect: str = "VERTICAL", fmt: str = "png") -> list[bytes]:
     """Generate PNG images via Gemini using the GenerativeModel defaults."""
 
@@ -158,19 +199,16 @@ def generate_images(prompt: str, n: int = 2, aspect: str = "VERTICAL", fmt: str
     if not 1 <= n <= 4:
         raise ValueError("n must be between 1 and 4")
 
-    if fmt.lower() not in {"png"}:
+    if fmt.lower() not in _ALLOWED_FORMATS:
         raise ValueError("unsupported image format")
 
     try:
-        model = genai.GenerativeModel(MODEL_NAME)
+        model = _get_model()
         pngs: list[bytes] = []
         missing = n
 
         for _ in range(2):
-            for _ in range(missing):
-                pngs.extend(_generate_with_model(model, prompt))
-                if len(pngs) >= n:
-                    break
+            pngs.extend(_generate_concurrently(model, prompt, missing))
             if len(pngs) >= n:
                 break
             missing = n - len(pngs)
@@ -187,10 +225,11 @@ def generate_images(prompt: str, n: int = 2, aspect: str = "VERTICAL", fmt: str
                 extra={"requested": n, "received": len(pngs)},
             )
 
-        LOGGER.info(
-            "gemini images generated",
-            extra={"model": MODEL_NAME, "count": len(pngs), "sha1": short_sha1(prompt)},
-        )
+        if LOGGER.isEnabledFor(logging.INFO):
+            LOGGER.info(
+                "gemini images generated",
+                extra={"model": MODEL_NAME, "count": len(pngs), "prompt_fp": short_hash(prompt.encode("utf-8"))},
+            )
 
         return pngs
     except Exception as exc:  # noqa: BLE001 - propagate after logging
@@ -3,9 +3,9 @@
 from __future__ import annotations
 
 import re
-from typing import Tuple
+from typing import Final, Tuple
 
-FORBIDDEN_KEYWORDS = {
+FORBIDDEN_KEYWORDS: Final[frozenset[str]] = frozenset({
     "nude",
     "nudity",
     "explicit",
@@ -20,14 +20,27 @@ FORBIDDEN_KEYWORDS = {
     "underage",
     "minor",
     "child",
-}
+})
+
+_WHITESPACE_RE: Final[re.Pattern[str]] = re.compile(r"\s+")
+
+# One alternation scans the prompt once instead of once per keyword; longer
+# keywords come first so "pornographic" wins over its prefix "porn". The
+# keywords are ASCII, so matching runs on ASCII-lowercased UTF-8 bytes.
+_FORBIDDEN_RE: Final[re.Pattern[bytes]] = re.compile(
+    b"|".join(
+        re.escape(keyword.encode("ascii"))
+        for keyword in sorted(FORBIDDEN_KEYWORDS, key=len, reverse=True)
+    )
+)
+_ASCII_LOWER: Final[bytes] = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", b"abcdefghijklmnopqrstuvwxyz")
 
 
 def sanitize(text: str) -> str:
     """Return a single-line sanitized string without markdown fences."""
 
     cleaned = text.replace("```", "")
-    cleaned = re.sub(r"\s+", " ", cleaned)
+    cleaned = _WHITESPACE_RE.sub(" ", cleaned)
     return cleaned.strip()
 
 
@@ -38,9 +51,9 @@ def validate_prompt(text: str) -> Tuple[bool, str]:
     if not sanitized:
         return False, "empty_prompt"
 
-    normalized = sanitized.lower()
-    for forbidden in FORBIDDEN_KEYWORDS:
-        if forbidden in normalized:
-            return False, f"forbidden_keyword:{forbidden}"
+    normalized = sanitized.encode("utf-8", errors="ignore").translate(_ASCII_LOWER)
+    match = _FORBIDDEN_RE.search(normalized)
+    if match:
+        return False, f"forbidden_keyword:{match.group(0).decode('ascii')}"
 
     return True, ""
@@ -2,41 +2,106 @@
 
 from __future__ import annotations
 
+import heapq
+import math
 import random
-from dataclasses import dataclass
-from typing import Sequence
+import sys
+from typing import NamedTuple, Sequence
 
 ASSISTANT_SYSTEM = """
 You are a fashion prompt generator specialized in tasteful, SFW women’s leatherwear. Provide exactly one vivid text-to-image prompt for each request. Describe the outfit, the model, and the scene with an editorial tone that highlights leather materials, textures, construction, and styling details. Mention pose, lighting, and camera mood without dictating rigid settings. Avoid brand names and copyrighted characters. Keep every depiction mature and safe-for-work. Respond with a single paragraph of plain text and no additional framing.
 """.strip()
 
+_RNG = random.Random()
+_choices = _RNG.choices
+_choice = _RNG.choice
+_randrange = _RNG.randrange
+_random = _RNG.random
+_sample = _RNG.sample
 
-@dataclass(frozen=True)
-class WeightedItem:
+
+class WeightedItem(NamedTuple):
     """Simple helper structure for weighted random selection."""
 
     value: str
     weight: float = 1.0
 
 
-def _weighted_choice(options: Sequence[WeightedItem]) -> str:
-    weights = [max(option.weight, 0.0) for option in options]
+def _choice_table(options: Sequence[WeightedItem]) -> tuple[tuple[str, ...], tuple[float, ...]]:
+    values = tuple(option.value for option in options)
+    weights = tuple(max(option.weight, 0.0) for option in options)
     if not any(weights):
-        weights = [1.0] * len(options)
-    return random.choices([option.value for option in options], weights=weights, k=1)[0]
+        weights = (1.0,) * len(options)
+    return values, weights
+
+
+def _build_alias(weights: Sequence[float]) -> tuple[tuple[float, ...], tuple[int, ...]]:
+    """Build Vose alias-method probability and alias tables for ``weights``."""
+
+    n = len(weights)
+    total = sum(weights)
+    scaled = [weight * n / total for weight in weights]
+    prob = [1.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        less = small.pop()
+        more = large.pop()
+        prob[less] = scaled[less]
+        alias[less] = more
+        scaled[more] = scaled[more] + scaled[less] - 1.0
+        if scaled[more] < 1.0:
+            small.append(more)
+        else:
+            large.append(more)
+    return tuple(prob), tuple(alias)
+
+
+# Filled for the module-level category tuples once they are defined. They live
+# for the whole process, so their ids cannot be reused by filtered lists.
+# Uniformly weighted categories store ``None`` instead of alias tables.
+_ALIAS_TABLES: dict[int, tuple[tuple[str, ...], tuple[float, ...] | None, tuple[int, ...] | None]] = {}
+
+
+def _weighted_choice(options: Sequence[WeightedItem]) -> str:
+    table = _ALIAS_TABLES.get(id(options))
+    if table is None:
+        values, weights = _choice_table(options)
+        return _choices(values, weights=weights, k=1)[0]
+    values, prob, alias = table
+    if prob is None:
+        return _choice(values)
+    index = _randrange(len(values))
+    return values[index] if _random() < prob[index] else values[alias[index]]
 
 
 def _weighted_sample(options: Sequence[WeightedItem], *, k: int) -> list[str]:
+    """Draw ``k`` distinct values without replacement (Efraimidis–Spirakis A-ES).
+
+    Each item gets the key ``log(U) / weight`` and the ``k`` largest keys win,
+    which matches repeated weighted draws that remove each pick from the pool.
+    Uniformly weighted cached categories skip the keys and draw indices directly.
+    """
+
     k = max(0, min(k, len(options)))
-    pool = list(options)
-    selected: list[str] = []
-    for _ in range(k):
-        choice = _weighted_choice(pool)
-        selected.append(choice)
-        pool = [item for item in pool if item.value != choice]
-        if not pool:
-            break
-    return selected
+    if not k:
+        return []
+    table = _ALIAS_TABLES.get(id(options))
+    if table is not None and table[1] is None:
+        values = table[0]
+        if k == 2:
+            n = len(values)
+            i = _randrange(n)
+            j = _randrange(n - 1)
+            if j >= i:
+                j += 1
+            return [values[i], values[j]]
+        return _sample(values, k)
+    rand = _random
+    log = math.log
+    keys = [(log(1.0 - rand()) / max(option.weight, 1e-9), option.value) for option in options]
+    return [value for _, value in heapq.nlargest(k, keys)]
 
 
 HEADWEAR = (
@@ -266,130 +331,187 @@ STYLE_DIRECTION = (
     WeightedItem("utility-luxe"),
 )
 
+_POLISHED_OUTERWEAR = frozenset(
+    item.value for item in OUTERWEAR if "trench" in item.value or "tailored" in item.value
+)
+_DRAMATIC_FINISHES = frozenset(
+    item.value
+    for item in LEATHER_FINISHES
+    if any(keyword in item.value for keyword in ("patent", "lacquer", "high-gloss", "mirror"))
+)
+_DRAMATIC_LIGHTING = tuple(
+    item for item in LIGHTING if "rim" in item.value or "moody" in item.value or "backlight" in item.value
+)
+_REFLECTIVE_SCENES = tuple(item for item in SCENES if "runway" in item.value or "rooftop" in item.value)
+_POLISHED_DETAILING = tuple(
+    item for item in DETAILING if "storm flaps" not in item.value or "trench" in item.value
+)
+
+_CATEGORIES = (
+    HEADWEAR,
+    HAIR,
+    NECKLINES,
+    OUTERWEAR,
+    CORSETRY,
+    TOPS,
+    DRESSES,
+    BOTTOMS,
+    HOSIERY,
+    FOOTWEAR,
+    GLOVES_AND_SMALL_GOODS,
+    ACCESSORIES,
+    LEATHER_FINISHES,
+    COLOR_PALETTE,
+    HARDWARE,
+    DETAILING,
+    FIT_AND_SILHOUETTE,
+    POSES,
+    SCENES,
+    LIGHTING,
+    CAMERA_AND_LENS,
+    STYLE_DIRECTION,
+    _DRAMATIC_LIGHTING,
+    _REFLECTIVE_SCENES,
+    _POLISHED_DETAILING,
+)
+
+for _index, _category in enumerate(_CATEGORIES):
+    _values = tuple(sys.intern(option.value) for option in _category)
+    _weights = tuple(max(option.weight, 0.0) for option in _category)
+    if not _values or sum(_weights) <= 0:
+        raise ValueError(f"_CATEGORIES[{_index}] is empty or has no positive weight")
+    if len(set(_weights)) == 1:
+        _ALIAS_TABLES[id(_category)] = (_values, None, None)
+    else:
+        _ALIAS_TABLES[id(_category)] = (_values, *_build_alias(_weights))
+del _index, _category, _values, _weights
+
+_WAIST_SYNONYMS = ("cinched waist", "waist emphasis", "belted silhouette")
+_FITTED_PHRASES = ("over a fitted base layer", "over a fine-gauge knit", "over the tonal underlayer")
+_FOOTWEAR_LEADS = ("Grounding the look,", "Anchoring the stance,", "She finishes with", "Balancing it below,")
+_ACCENT_DESCRIPTORS = ("considered", "refined", "purposeful")
+_HAIR_DESCRIPTORS = ("slick", "refined", "luminous")
+_TEXTURE_VERBS = ("mirrors", "contrasts", "echoes")
+
 
 def _needs_polished_layers(outerwear: str) -> bool:
-    return "trench" in outerwear or "tailored" in outerwear
+    return outerwear in _POLISHED_OUTERWEAR
 
 
 def _select_finish() -> tuple[str, bool]:
     finish = _weighted_choice(LEATHER_FINISHES)
-    dramatic = any(keyword in finish for keyword in ("patent", "lacquer", "high-gloss", "mirror"))
-    return finish, dramatic
+    return finish, finish in _DRAMATIC_FINISHES
 
 
 def _select_lighting(dramatic_finish: bool) -> str:
     if dramatic_finish:
-        dramatic_choices = [item for item in LIGHTING if "rim" in item.value or "moody" in item.value or "backlight" in item.value]
-        if dramatic_choices:
-            return _weighted_choice(dramatic_choices)
+        return _weighted_choice(_DRAMATIC_LIGHTING)
     return _weighted_choice(LIGHTING)
 
 
 def _select_scene(dramatic_finish: bool) -> str:
-    if dramatic_finish:
-        reflective_choices = [item for item in SCENES if "runway" in item.value or "rooftop" in item.value]
-        if reflective_choices and random.random() < 0.6:
-            return _weighted_choice(reflective_choices)
+    if dramatic_finish and _random() < 0.6:
+        return _weighted_choice(_REFLECTIVE_SCENES)
     return _weighted_choice(SCENES)
 
 
-def _select_primary_layers(polished: bool) -> dict[str, str]:
-    outfit_plan: dict[str, str] = {}
-    if random.random() < 0.45:
-        dress = _weighted_choice(DRESSES)
-        neckline = _weighted_choice(NECKLINES)
-        outfit_plan["dress"] = f"{dress} with a {neckline}"
+_OUTERWEAR_TMPL = "She shrugs into a %s crafted in %s %s, its %s and %s adding %s."
+_DRESS_BASE_TMPL = "%s with a %s"
+_DRESS_TMPL = "Underneath sits a %s rendered in %s %s, carrying %s for %s."
+_TOP_BASE_TMPL = "%s featuring a %s"
+_TOP_TMPL = "The %s is cut from %s %s, balanced by %s lines."
+_BOTTOM_TMPL = "She pairs it with a %s tailored in the same %s tone, finished with %s and accented by %s."
+_CORSET_OVER_TMPL = "a %s cinched over the %s and anchored beneath the %s"
+_CORSET_WAIST_TMPL = "a %s defining the waist %s"
+_CORSET_LAYERED_TMPL = "a %s layered %s"
+_CORSETRY_TMPL = "Completing the midsection is %s, ensuring the look stays impeccably SFW while highlighting structure."
+_HOSIERY_TMPL = "Layered beneath, %s bring texture continuity down the legs."
+_FOOTWEAR_TMPL = "%s %s maintain the leather narrative."
+_GLOVES_TMPL = "Small leather goods include %s."
+_ACCESSORIES_TMPL = "Jewelry and accents stay %s with %s."
+_POSE_TMPL = "She holds %s within a %s, channeling a %s attitude."
+_FRAME_TMPL = "%s and %s shape the frame with editorial clarity."
+_HAIR_TMPL = "Her %s stays %s, echoing the lines of the %s."
+_HEADWEAR_TMPL = "%s %s the leather story while her %s keeps the profile precise."
+
+
+def _build_layer_sentences(polished: bool, outerwear: str, finish: str, color: str, detailing: list[str], hardware: list[str], fit: str) -> list[str]:
+    """Pick the dress or top/bottom base, optional corsetry, and describe the layers."""
+
+    sentences: list[str] = []
+    has_outerwear = outerwear != "no outer layer"
+    waist_synonym = _choice(_WAIST_SYNONYMS)
+    if has_outerwear:
+        sentences.append(_OUTERWEAR_TMPL % (outerwear, color, finish, _choice(detailing), _choice(hardware), waist_synonym))
+
+    is_dress = _random() < 0.45
+    if is_dress:
+        base_layer = _DRESS_BASE_TMPL % (_weighted_choice(DRESSES), _weighted_choice(NECKLINES))
+        sentences.append(_DRESS_TMPL % (base_layer, color, finish, ", ".join(detailing[:2]), fit))
     else:
         top = _weighted_choice(TOPS)
         if polished and "tube" in top:
             top = "matte leather bodysuit"
-        neckline = _weighted_choice(NECKLINES)
-        outfit_plan["top"] = f"{top} featuring a {neckline}"
+        base_layer = _TOP_BASE_TMPL % (top, _weighted_choice(NECKLINES))
         bottom = _weighted_choice(BOTTOMS)
-        outfit_plan["bottom"] = bottom
-    return outfit_plan
-
+        sentences.append(_TOP_TMPL % (base_layer, color, finish, fit))
+        sentences.append(_BOTTOM_TMPL % (bottom, color, _choice(detailing), _choice(hardware)))
 
-def _maybe_add_corsetry(polished: bool, outerwear: str, layers: dict[str, str]) -> str | None:
-    if random.random() < 0.55:
+    if _random() < 0.55:
         corset = _weighted_choice(CORSETRY)
         if polished and "harness" in corset:
             corset = "structured corset"
-        base_reference = "dress" if "dress" in layers else "top"
-        if outerwear != "no outer layer" and random.random() < 0.6:
-            return f"a {corset} cinched over the {layers[base_reference]} and anchored beneath the {outerwear}"
-        fitted_phrase = random.choice(("over a fitted base layer", "over a fine-gauge knit", "over the tonal underlayer"))
-        if base_reference == "dress":
-            return f"a {corset} defining the waist {fitted_phrase}"
-        return f"a {corset} layered {fitted_phrase}"
-    return None
-
-
-def _build_layer_sentences(layers: dict[str, str], outerwear: str, corsetry: str | None, finish: str, color: str, detailing: list[str], hardware: list[str], fit: str) -> list[str]:
-    sentences: list[str] = []
-    waist_synonym = random.choice(("cinched waist", "waist emphasis", "belted silhouette"))
-    if outerwear != "no outer layer":
-        outer_sentence = f"She shrugs into a {outerwear} crafted in {color} {finish}, its {random.choice(detailing)} and {random.choice(hardware)} adding {waist_synonym}."
-        sentences.append(outer_sentence)
-    if "dress" in layers:
-        dress_sentence = f"Underneath sits a {layers['dress']} rendered in {color} {finish}, carrying {', '.join(detailing[:2])} for {fit}."
-        sentences.append(dress_sentence)
-    else:
-        top_sentence = f"The {layers['top']} is cut from {color} {finish}, balanced by {fit} lines."
-        sentences.append(top_sentence)
-        bottom_sentence = f"She pairs it with a {layers['bottom']} tailored in the same {color} tone, finished with {random.choice(detailing)} and accented by {random.choice(hardware)}."
-        sentences.append(bottom_sentence)
-    if corsetry:
-        sentences.append(f"Completing the midsection is {corsetry}, ensuring the look stays impeccably SFW while highlighting structure.")
+        if has_outerwear and _random() < 0.6:
+            corsetry = _CORSET_OVER_TMPL % (corset, base_layer, outerwear)
+        else:
+            fitted_phrase = _choice(_FITTED_PHRASES)
+            if is_dress:
+                corsetry = _CORSET_WAIST_TMPL % (corset, fitted_phrase)
+            else:
+                corsetry = _CORSET_LAYERED_TMPL % (corset, fitted_phrase)
+        sentences.append(_CORSETRY_TMPL % corsetry)
     return sentences
 
 
 def _build_accessory_sentences(hosiery: str, footwear: str, gloves: list[str], accessories: list[str]) -> list[str]:
     sentences: list[str] = []
     if hosiery != "no hosiery":
-        sentences.append(f"Layered beneath, {hosiery} bring texture continuity down the legs.")
-    footwear_sentence = f"{random.choice(('Grounding the look,', 'Anchoring the stance,', 'She finishes with', 'Balancing it below,'))} {footwear} maintain the leather narrative."
-    sentences.append(footwear_sentence)
+        sentences.append(_HOSIERY_TMPL % hosiery)
+    sentences.append(_FOOTWEAR_TMPL % (_choice(_FOOTWEAR_LEADS), footwear))
     if gloves:
-        glove_sentence = f"Small leather goods include {', '.join(gloves)}."
-        sentences.append(glove_sentence)
+        sentences.append(_GLOVES_TMPL % ", ".join(gloves))
     if accessories:
-        accessories_sentence = f"Jewelry and accents stay {random.choice(('considered', 'refined', 'purposeful'))} with {', '.join(accessories)}."
-        sentences.append(accessories_sentence)
+        sentences.append(_ACCESSORIES_TMPL % (_choice(_ACCENT_DESCRIPTORS), ", ".join(accessories)))
     return sentences
 
 
 def _build_environment_sentence(scene: str, lighting: str, camera: list[str], pose: str, style: str) -> list[str]:
-    sentences: list[str] = []
-    camera_phrase = ", ".join(camera)
-    sentences.append(
-        f"She holds {pose} within a {scene}, channeling a {style} attitude."
-    )
-    sentences.append(
-        f"{lighting.capitalize()} and {camera_phrase} shape the frame with editorial clarity."
-    )
-    return sentences
+    return [
+        _POSE_TMPL % (pose, scene, style),
+        _FRAME_TMPL % (lighting.capitalize(), ", ".join(camera)),
+    ]
 
 
 def _build_headwear_sentence(headwear: str, hair: str, outerwear: str) -> str:
     if headwear == "no headwear":
-        descriptor = random.choice(("slick", "refined", "luminous"))
-        return f"Her {hair} stays {descriptor}, echoing the lines of the {outerwear if outerwear != 'no outer layer' else 'look'}."
-    texture_phrase = random.choice(("mirrors", "contrasts", "echoes"))
-    return f"{headwear.capitalize()} {texture_phrase} the leather story while her {hair} keeps the profile precise."
+        descriptor = _choice(_HAIR_DESCRIPTORS)
+        return _HAIR_TMPL % (hair, descriptor, outerwear if outerwear != "no outer layer" else "look")
+    texture_phrase = _choice(_TEXTURE_VERBS)
+    return _HEADWEAR_TMPL % (headwear.capitalize(), texture_phrase, hair)
 
 
 def _select_detailing(count: int, polished: bool) -> list[str]:
-    options = list(DETAILING)
-    if polished:
-        options = [item for item in options if "storm flaps" not in item.value or "trench" in item.value]
-    return _weighted_sample(options, k=count)
+    return _weighted_sample(_POLISHED_DETAILING if polished else DETAILING, k=count)
 
 
 def _select_hardware(count: int) -> list[str]:
     return _weighted_sample(HARDWARE, k=count)
 
 
+_INTRO_SENTENCE = "Craft a single SFW text-to-image prompt in English for a women's leather fashion image, blending outfit, model, setting, and atmosphere into one flowing paragraph."
+_SFW_SENTENCE = "Keep the description mature, tasteful, and focused on leather craftsmanship without mentioning brands or explicit content."
+
+
 def build_randomized_user_prompt() -> str:
     outerwear = _weighted_choice(OUTERWEAR)
     polished_layers = _needs_polished_layers(outerwear)
@@ -397,32 +519,28 @@ def build_randomized_user_prompt() -> str:
     hair = _weighted_choice(HAIR)
     finish, dramatic_finish = _select_finish()
     color = _weighted_choice(COLOR_PALETTE)
-    detailing = _select_detailing(count=random.choice((2, 3)), polished=polished_layers)
+    detailing = _select_detailing(count=_choice((2, 3)), polished=polished_layers)
     hardware = _select_hardware(count=2)
     fit = _weighted_choice(FIT_AND_SILHOUETTE)
-    layers = _select_primary_layers(polished_layers)
-    corsetry = _maybe_add_corsetry(polished_layers, outerwear, layers)
     hosiery = _weighted_choice(HOSIERY)
     footwear = _weighted_choice(FOOTWEAR)
-    gloves = _weighted_sample(GLOVES_AND_SMALL_GOODS, k=random.choice((0, 1, 2)))
-    accessories = _weighted_sample(ACCESSORIES, k=random.choice((1, 2)))
+    gloves = _weighted_sample(GLOVES_AND_SMALL_GOODS, k=_choice((0, 1, 2)))
+    accessories = _weighted_sample(ACCESSORIES, k=_choice((1, 2)))
     pose = _weighted_choice(POSES)
     scene = _select_scene(dramatic_finish)
     lighting = _select_lighting(dramatic_finish)
     camera = _weighted_sample(CAMERA_AND_LENS, k=2)
     style = _weighted_choice(STYLE_DIRECTION)
 
-    sentences: list[str] = []
-    sentences.append(_build_headwear_sentence(headwear, hair, outerwear))
-    sentences.extend(_build_layer_sentences(layers, outerwear, corsetry, finish, color, detailing, hardware, fit))
-    sentences.extend(_build_accessory_sentences(hosiery, footwear, gloves, accessories))
-    sentences.extend(_build_environment_sentence(scene, lighting, camera, pose, style))
-
-    intro_sentence = "Craft a single SFW text-to-image prompt in English for a women's leather fashion image, blending outfit, model, setting, and atmosphere into one flowing paragraph."
-    sfw_sentence = "Keep the description mature, tasteful, and focused on leather craftsmanship without mentioning brands or explicit content."
-
-    core_sentences = sentences
-    random.shuffle(core_sentences)
-    paragraph_parts = [intro_sentence, sfw_sentence, *core_sentences]
-    return " ".join(paragraph_parts)
+    core_sentences = [
+        _build_headwear_sentence(headwear, hair, outerwear),
+        *_build_layer_sentences(polished_layers, outerwear, finish, color, detailing, hardware, fit),
+        *_build_accessory_sentences(hosiery, footwear, gloves, accessories),
+        *_build_environment_sentence(scene, lighting, camera, pose, style),
+    ]
+    randrange = _randrange
+    for i in range(len(core_sentences) - 1, 0, -1):
+        j = randrange(i + 1)
+        core_sentences[i], core_sentences[j] = core_sentences[j], core_sentences[i]
+    return " ".join((_INTRO_SENTENCE, _SFW_SENTENCE, *core_sentences))
 
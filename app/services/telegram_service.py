@@ -4,18 +4,22 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import contextvars
 import hashlib
-import json
 import logging
 from getpass import getpass
 from pathlib import Path
-from typing import Awaitable, Callable, TypeVar
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, TypeVar
 
+import orjson
 from telethon import TelegramClient, errors
 
 from app.config import settings
 from app import logging_conf
 
+if TYPE_CHECKING:
+    from telethon.tl.types import TypeInputPeer
+
 
 logger = logging.getLogger(__name__)
 
@@ -25,25 +29,73 @@ _SESSION_PATH = _PROJECT_ROOT / _SESSION_NAME
 
 _client: TelegramClient | None = None
 _client_lock = asyncio.Lock()
-_LOGIN_MODE = False
+_target_entity: TypeInputPeer | None = None
+_LOGIN_MODE: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "tg_login_mode", default=False
+)
 
 _T = TypeVar("_T")
 
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_TG_MAX_MESSAGE = 4096
+_UPLOAD_CONCURRENCY = 4
+_dumps = orjson.dumps
+_CHUNK_SEPARATORS = ("\n\n", "\n", " ")
+
+# Control characters other than tab/newline/carriage return, plus lone
+# surrogates that cannot be encoded as UTF-8.
+_CAPTION_STRIP_TABLE = dict.fromkeys(
+    [*(code for code in range(32) if code not in (9, 10, 13)), *range(0xD800, 0xE000)]
+)
+
 
 def sanitize_caption(caption: str, limit: int = 1024) -> str:
     """Return a caption trimmed to the Telegram-safe limit without control characters."""
 
-    cleaned = caption.encode("utf-8", errors="ignore").decode("utf-8", errors="ignore")
-    cleaned = "".join(ch for ch in cleaned if ch >= " " or ch in {"\n", "\r", "\t"})
+    cleaned = caption.translate(_CAPTION_STRIP_TABLE)
     if len(cleaned) > limit:
         cleaned = cleaned[:limit]
     return cleaned
 
 
+def chunk_text(text: str, limit: int = _TG_MAX_MESSAGE) -> list[str]:
+    """Split text into chunks of at most ``limit`` characters.
+
+    Each cut falls on the last paragraph break, line break, or space in the
+    second half of the window (in that order of preference) and drops that
+    separator; a window without any such separator is cut hard at ``limit``.
+    """
+
+    if limit <= 0:
+        raise ValueError("limit must be positive")
+    if not text:
+        return []
+
+    chunks: list[str] = []
+    start = 0
+    length = len(text)
+    while length - start > limit:
+        end = start + limit
+        # Cutting earlier than mid-window would emit needlessly short chunks.
+        lowest_cut = start + max(limit // 2, 1)
+        for separator in _CHUNK_SEPARATORS:
+            cut = text.rfind(separator, lowest_cut, end + len(separator))
+            if cut != -1:
+                chunks.append(text[start:cut])
+                start = cut + len(separator)
+                break
+        else:
+            chunks.append(text[start:end])
+            start = end
+    if start < length:
+        chunks.append(text[start:])
+    return chunks
+
+
 def ensure_png_bytes(data: bytes) -> bytes:
     """Return image data and warn if the payload does not appear to be a PNG."""
 
-    if not data.startswith(b"\x89PNG\r\n\x1a\n"):
+    if not data.startswith(_PNG_SIGNATURE) and logger.isEnabledFor(logging.WARNING):
         context = logging_conf.get_log_context()
         payload = {
             "event": "telegram_non_png_payload",
@@ -51,7 +103,7 @@ def ensure_png_bytes(data: bytes) -> bytes:
             "request_id": context.get("request_id"),
             "job_id": context.get("job_id"),
         }
-        logger.warning(json.dumps(payload, ensure_ascii=False))
+        logger.warning(_dumps(payload).decode("utf-8"))
     return data
 
 
@@ -72,18 +124,20 @@ async def _ensure_client() -> TelegramClient:
         await client.connect()
 
         if not await client.is_user_authorized():
-            if not _LOGIN_MODE:
+            if not _LOGIN_MODE.get():
                 await client.disconnect()
                 raise RuntimeError(
                     "Telegram session not authorized. Run `python -m app.services.telegram_service --login` first."
                 )
 
             await client.send_code_request(settings.tg_phone)
-            code = input("Enter the Telegram code sent to your app: ").strip()
+            code = (
+                await asyncio.to_thread(input, "Enter the Telegram code sent to your app: ")
+            ).strip()
             try:
                 await client.sign_in(settings.tg_phone, code)
             except errors.SessionPasswordNeededError:
-                password = getpass("Enter your Telegram 2FA password: ")
+                password = await asyncio.to_thread(getpass, "Enter your Telegram 2FA password: ")
                 await client.sign_in(password=password)
 
         _client = client
@@ -93,60 +147,87 @@ async def _ensure_client() -> TelegramClient:
 async def close_client() -> None:
     """Disconnect the client and reset shared state."""
 
-    global _client
+    global _client, _target_entity
 
     async with _client_lock:
         if _client:
             await _client.disconnect()
         _client = None
+        _target_entity = None
 
 
-async def _resolve_target_entity(client: TelegramClient):
+async def _resolve_target_entity(client: TelegramClient) -> TypeInputPeer:
     """Return the Telegram entity for the configured target chat."""
 
-    return await client.get_input_entity(settings.tg_target_chat_id)
+    global _target_entity
 
+    if _target_entity is None:
+        _target_entity = await client.get_input_entity(settings.tg_target_chat_id)
+    return _target_entity
 
-def _log_success(event: str, **details: object) -> None:
-    context = logging_conf.get_log_context()
-    payload = {
-        "event": event,
-        "status": "success",
-        "request_id": context.get("request_id"),
-        "job_id": context.get("job_id"),
-        **{k: v for k, v in details.items() if v is not None},
-    }
-    logger.info(json.dumps(payload, ensure_ascii=False))
 
+async def warmup() -> None:
+    """Connect the client and resolve the target chat ahead of the first send."""
 
-def _log_error(event: str, exc: Exception) -> None:
-    context = logging_conf.get_log_context()
-    payload = {
-        "event": event,
-        "status": "error",
-        "error": exc.__class__.__name__,
-        "error_message": str(exc),
-        "request_id": context.get("request_id"),
-        "job_id": context.get("job_id"),
-    }
-    logger.error(json.dumps(payload, ensure_ascii=False))
+    client = await _ensure_client()
+    await _resolve_target_entity(client)
 
 
-def _log_warning(event: str, **details: object) -> None:
-    context = logging_conf.get_log_context()
+def _emit(
+    level: int, event: str, context: dict[str, Any] | None, /, **fields: object
+) -> None:
+    if not logger.isEnabledFor(level):
+        return
+    if context is None:
+        context = logging_conf.get_log_context()
     payload = {
         "event": event,
-        "level": "warning",
+        **fields,
         "request_id": context.get("request_id"),
         "job_id": context.get("job_id"),
-        **{k: v for k, v in details.items() if v is not None},
     }
-    logger.warning(json.dumps(payload, ensure_ascii=False))
+    # stacklevel=3 attributes the record to whoever called the _log_* wrapper.
+    logger.log(level, _dumps(payload).decode("utf-8"), stacklevel=3)
+
+
+def _log_success(
+    event: str, *, context: dict[str, Any] | None = None, **details: object
+) -> None:
+    _emit(logging.INFO, event, context, status="success", **details)
+
+
+def _log_error(
+    event: str, exc: Exception, *, context: dict[str, Any] | None = None
+) -> None:
+    _emit(
+        logging.ERROR,
+        event,
+        context,
+        status="error",
+        error=exc.__class__.__name__,
+        error_message=str(exc),
+    )
+
+
+def _log_warning(
+    event: str, *, context: dict[str, Any] | None = None, **details: object
+) -> None:
+    _emit(logging.WARNING, event, context, level="warning", **details)
 
 
 async def _execute_with_retry(
-    action: str, func: Callable[[TelegramClient], Awaitable[object]]
-) -> object:
+    action: str,
+    func: Callable[[TelegramClient], Awaitable[_T]],
+    *,
+    structured_log: bool = True,
+    context: dict[str, Any] | None = None,
+) -> _T:
+    """Run ``func`` with one flood-wait retry.
+
+    With ``structured_log=False`` only flood waits are logged (as plain text)
+    and other errors are left for the caller to report.
+    """
+
     attempts = 0
     while True:
         attempts += 1
@@ -155,31 +236,38 @@ async def _execute_with_retry(
             return await func(client)
         except errors.FloodWaitError as exc:
             if attempts >= 2:
-                _log_error(action, exc)
+                if structured_log:
+                    _log_error(action, exc, context=context)
                 raise
             wait_seconds = min(getattr(exc, "seconds", 0) or 0, 30) or 1
-            _log_warning(
-                action,
-                warning="flood_wait",
-                wait_seconds=wait_seconds,
-            )
+            if structured_log:
+                _log_warning(
+                    action,
+                    context=context,
+                    warning="flood_wait",
+                    wait_seconds=wait_seconds,
+                )
+            else:
+                logger.warning("telegram flood wait: sleeping %s seconds", wait_seconds)
             await asyncio.sleep(wait_seconds)
-        except errors.ChatWriteForbiddenError as exc:
-            _log_error(action, exc)
-            raise
         except Exception as exc:  # pragma: no cover - defensive catch for unexpected errors
-            _log_error(action, exc)
+            if structured_log:
+                _log_error(action, exc, context=context)
             raise
 
 
-async def send_text(message: str) -> None:
+async def send_text(message: str, *, context: dict[str, Any] | None = None) -> None:
     """Send a text message to the configured Telegram chat."""
 
+    if context is None:
+        context = logging_conf.get_log_context()
+
     async def _send(client: TelegramClient) -> None:
-        await client.send_message(settings.tg_target_chat_id, message)
+        target = await _resolve_target_entity(client)
+        await client.send_message(target, message)
 
-    await _execute_with_retry("telegram_send_text", _send)
-    _log_success("telegram_send_text")
+    await _execute_with_retry("telegram_send_text", _send, context=context)
+    _log_success("telegram_send_text", context=context)
 
 
 async def send_error_message(message: str) -> None:
@@ -192,15 +280,16 @@ async def send_error_message(message: str) -> None:
         prefix = f"{prefix} [request_id={request_id}]"
     formatted = f"{prefix} {message}"
 
-    await send_text(formatted)
+    await send_text(formatted, context=context)
 
 
 async def send_images_with_caption(images: list[bytes], caption: str) -> None:
     """Upload PNG images and send them as an album with a caption."""
 
+    context = logging_conf.get_log_context()
     if not images:
         combined_caption = sanitize_caption(caption)
-        await send_text(f"{combined_caption}\n(no images)")
+        await send_text(f"{combined_caption}\n(no images)", context=context)
         return
 
     if len(images) > 10:
@@ -209,23 +298,7 @@ async def send_images_with_caption(images: list[bytes], caption: str) -> None:
     safe_caption = sanitize_caption(caption)
 
     await send_images_and_prompt(images, prompt_text=safe_caption)
-    _log_success("telegram_send_images", image_count=len(images))
-
-
-async def _run_with_floodwait_retry(
-    operation: Callable[[], Awaitable[_T]],
-) -> _T:
-    attempts = 0
-    while True:
-        attempts += 1
-        try:
-            return await operation()
-        except errors.FloodWaitError as exc:
-            if attempts >= 2:
-                raise
-            wait_seconds = min(getattr(exc, "seconds", 0) or 0, 30) or 1
-            logger.warning("telegram flood wait: sleeping %s seconds", wait_seconds)
-            await asyncio.sleep(wait_seconds)
+    _log_success("telegram_send_images", context=context, image_count=len(images))
 
 
 async def send_images_and_prompt(
@@ -242,73 +315,102 @@ async def send_images_and_prompt(
             if len(images) > 10:
                 raise ValueError("Telegram supports at most 10 media files per album")
 
-            for idx, image in enumerate(images):
-                data = ensure_png_bytes(image)
-                uploaded = await _run_with_floodwait_retry(
-                    lambda data=data, idx=idx: client.upload_file(
-                        data, file_name=f"nb_{idx + 1:02d}.png"
+            # Uploads run concurrently (bounded to stay clear of flood limits);
+            # gather keeps the album order.
+            upload_slots = asyncio.Semaphore(_UPLOAD_CONCURRENCY)
+
+            async def _upload(idx: int, data: bytes) -> object:
+                async with upload_slots:
+                    return await _execute_with_retry(
+                        "telegram_upload_file",
+                        lambda client: client.upload_file(
+                            data, file_name=f"nb_{idx + 1:02d}.png"
+                        ),
+                        structured_log=False,
                     )
-                )
-                uploaded_files.append(uploaded)
+
+            uploads = [
+                asyncio.create_task(_upload(idx, ensure_png_bytes(image)))
+                for idx, image in enumerate(images)
+            ]
+            try:
+                uploaded_files = await asyncio.gather(*uploads)
+            except BaseException:
+                # gather leaves the other uploads running; stop them before re-raising.
+                for upload in uploads:
+                    upload.cancel()
+                await asyncio.gather(*uploads, return_exceptions=True)
+                raise
 
             if uploaded_files:
-                await _run_with_floodwait_retry(
-                    lambda: client.send_file(
+                await _execute_with_retry(
+                    "telegram_send_album",
+                    lambda client: client.send_file(
                         entity=target, file=uploaded_files, force_document=False
-                    )
+                    ),
+                    structured_log=False,
                 )
                 logger.info("sent album as photos: count=%d", len(uploaded_files))
 
-        text_parts: list[str] = []
-        if header:
-            header_line = header.strip()
-            if header_line:
-                text_parts.append(header_line)
-                text_parts.append("")
-
-        text_parts.append("Prompt:")
-        text_parts.append(prompt_text)
-        full_text = "\n".join(text_parts)
+        header_line = header.strip() if header else ""
+        if header_line:
+            full_text = f"{header_line}\n\nPrompt:\n{prompt_text}"
+        else:
+            full_text = f"Prompt:\n{prompt_text}"
         message_count = 0
 
-        try:
-            await _run_with_floodwait_retry(
-                lambda: client.send_message(target, full_text, link_preview=False)
-            )
-            message_count += 1
-        except errors.MessageTooLongError:
+        # Text that is already over the limit skips the doomed single send.
+        chunks: list[str] = []
+        if len(full_text) > _TG_MAX_MESSAGE:
+            chunks = chunk_text(full_text)
+        else:
+            try:
+                await _execute_with_retry(
+                    "telegram_send_prompt",
+                    lambda client: client.send_message(target, full_text, link_preview=False),
+                    structured_log=False,
+                )
+                message_count += 1
+            except errors.MessageTooLongError:
+                chunks = chunk_text(full_text)
+
+        if chunks:
             _log_warning(
                 "telegram_send_prompt",
                 warning="message_too_long",
                 prompt_length=len(full_text),
             )
-            emergency_limit = 4096
-            for start in range(0, len(full_text), emergency_limit):
-                chunk = full_text[start : start + emergency_limit]
-                await _run_with_floodwait_retry(
-                    lambda chunk=chunk: client.send_message(
+            for chunk in chunks:
+                await _execute_with_retry(
+                    "telegram_send_prompt",
+                    lambda client, chunk=chunk: client.send_message(
                         target, chunk, link_preview=False
-                    )
+                    ),
+                    structured_log=False,
                 )
                 message_count += 1
-        prompt_hash = hashlib.sha256(prompt_text.encode("utf-8")).hexdigest()[:8]
-
-        logger.info(
-            "telegram: sent album=%d prompt_messages=%d prompt_length=%d hash=%s",
-            len(images),
-            message_count,
-            len(prompt_text),
-            prompt_hash,
-        )
+        if logger.isEnabledFor(logging.INFO):
+            prompt_hash = hashlib.blake2b(
+                prompt_text.encode("utf-8"), digest_size=4
+            ).hexdigest()
+            logger.info(
+                "telegram: sent album=%d prompt_messages=%d prompt_length=%d hash=%s",
+                len(images),
+                message_count,
+                len(prompt_text),
+                prompt_hash,
+            )
     except Exception as exc:  # noqa: BLE001
         logger.error("telegram send failed: %s: %s", exc.__class__.__name__, str(exc))
         raise
 
 
 async def _cli_login() -> None:
-    global _LOGIN_MODE
-    _LOGIN_MODE = True
-    await _ensure_client()
+    token = _LOGIN_MODE.set(True)
+    try:
+        await _ensure_client()
+    finally:
+        _LOGIN_MODE.reset(token)
     print("Telegram session authorized.")
 
 
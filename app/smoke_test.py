@@ -4,9 +4,9 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import contextlib
 import hashlib
 import logging
-import time
 from typing import Sequence
 
 from app import logging_conf
@@ -26,6 +26,12 @@ def _build_parser() -> argparse.ArgumentParser:
         default="vertical",
         help="Image aspect ratio preset",
     )
+    parser.add_argument(
+        "--cool-seconds",
+        type=float,
+        default=0.0,
+        help="Pause between prompt and image generation (default: no pause)",
+    )
     parser.add_argument(
         "--no-send",
         action="store_true",
@@ -47,35 +53,50 @@ def _print_diagnostics(images: Sequence[bytes]) -> None:
         print(f"image {idx}: {len(image)} bytes")
 
 
-def main() -> None:
-    logging_conf.configure_logging()
-    parser = _build_parser()
-    args = parser.parse_args()
-
+async def _run(args: argparse.Namespace) -> None:
+    # Connect to Telegram while the prompt and images are being generated.
+    warmup = None if args.no_send else asyncio.create_task(telegram_service.warmup())
     try:
-        prompt = assistant_service.generate_prompt_text()
+        prompt = await asyncio.to_thread(assistant_service.generate_prompt_text)
         LOGGER.info(
             "generated prompt metadata: length=%d hash=%s",
             len(prompt),
-            hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8],
+            hashlib.blake2b(prompt.encode("utf-8"), digest_size=4).hexdigest(),
         )
-        LOGGER.info("sleeping 30s before image generation")
-        time.sleep(30)
+        if args.cool_seconds > 0:
+            LOGGER.info("sleeping %.1fs before image generation", args.cool_seconds)
+            await asyncio.sleep(args.cool_seconds)
         aspect_key = args.aspect.upper()
-        images = gemini_service.generate_images(prompt, n=args.n, aspect=aspect_key, fmt="png")
+        images = await asyncio.to_thread(
+            gemini_service.generate_images, prompt, n=args.n, aspect=aspect_key, fmt="png"
+        )
 
-        if args.no_send:
+        if warmup is None:
             _print_diagnostics(images)
             LOGGER.info("smoke success: count=%d sent=%s", len(images), False)
             return
 
+        await warmup
         header = _format_header(len(images), aspect_key)
-        asyncio.run(
-            telegram_service.send_images_and_prompt(
-                list(images), prompt_text=prompt, header=header
-            )
+        await telegram_service.send_images_and_prompt(
+            list(images), prompt_text=prompt, header=header
         )
         LOGGER.info("smoke success: count=%d sent=%s", len(images), True)
+    finally:
+        if warmup is not None:
+            warmup.cancel()
+            # Retrieve the outcome so a failed warmup is not reported as never retrieved.
+            with contextlib.suppress(Exception, asyncio.CancelledError):
+                await warmup
+
+
+def main() -> None:
+    logging_conf.configure_logging()
+    parser = _build_parser()
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_run(args))
     except Exception as exc:  # noqa: BLE001
         LOGGER.error("smoke test failed: %s: %s", exc.__class__.__name__, str(exc))
         raise
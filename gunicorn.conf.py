@@ -0,0 +1,10 @@
+# gunicorn.conf.py
+# Run with: `gunicorn app.main:app -c gunicorn.conf.py`
+
+bind = "0.0.0.0:8000"
+# Keep a single worker: the run-now queue (app.queue) is per-process state.
+workers = 1
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the application once in the master so workers share it via fork.
+preload_app = True